@@ -35,6 +35,7 @@ import tempfile
 import time
 import webbrowser
 # Third-party module or package imports.
+import jinja2
 import matplotlib.pyplot as plt
 import numpy as np
 import simplejson
@@ -48,6 +49,11 @@ from buildingspy.io.postprocess import Plotter
 import buildingspy.io.outputfile as of
 import buildingspy.io.reporter as rep
 
+# Environment for the templates of the OPTIMICA and JModelica run files.
+# It is created once so that each template is loaded and compiled only once.
+_TEMPLATE_ENV = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(os.path.dirname(os.path.abspath(__file__))))
+
 
 def runSimulation(worDir, cmd):
     """ Run the simulation.
@@ -59,11 +65,15 @@ def runSimulation(worDir, cmd):
     .. note:: This method is outside the class definition to
               allow parallel computing.
     """
-    # JModelica requires the working directory to be part of MODELICAPATH
-    if 'MODELICAPATH' in os.environ:
-        os.environ['MODELICAPATH'] = "{}:{}".format(worDir, os.environ['MODELICAPATH'])
+    # JModelica requires the working directory to be part of MODELICAPATH.
+    # The environment is copied so that MODELICAPATH of this process
+    # does not grow with each call.
+    env = os.environ.copy()
+    mod_pat = env.get('MODELICAPATH')
+    if mod_pat is None:
+        env['MODELICAPATH'] = worDir
     else:
-        os.environ['MODELICAPATH'] = worDir
+        env['MODELICAPATH'] = worDir + os.pathsep + mod_pat
 
     logFilNam = os.path.join(worDir, 'stdout.log')
 #
@@ -73,7 +83,8 @@ def runSimulation(worDir, cmd):
                                stdout=logFil,
                                stderr=logFil,
                                shell=False,
-                               cwd=worDir)
+                               cwd=worDir,
+                               env=env)
         try:
             retcode = pro.wait()
             if retcode != 0:
@@ -212,6 +223,7 @@ class Tester(object):
          {
            "optimica": {
              "ncp": 500,
+             "result_handling": "binary",
              "rtol": 1E-6,
              "solver": "CVode",
              "simulate": True,
@@ -226,6 +238,11 @@ class Tester(object):
     are the default values, except for the relative tolerance `rtol`
     which is read from the `.mo` file. However, with `rtol`, this
     value can be overwritten.
+    The entry `result_handling` is passed to the simulation options of pyfmi.
+    Set it to `memory` to avoid writing the result file for models that
+    have no result variables that are compared with reference results.
+    For models with such result variables, `binary` is used,
+    as the comparison reads the results from the binary `.mat` file.
     Note that this syntax is still experimental and may be changed.
     """
 
@@ -1146,6 +1163,7 @@ class Tester(object):
                 'translate': True,
                 'simulate': True,
                 'ncp': 500,
+                'result_handling': 'binary',
                 'time_out': 1200
             }
         }
@@ -3184,23 +3202,17 @@ class Tester(object):
         :param directory: The name of the directory where the files will be written.
         :param data: A list with the data for the experiments.
         """
-        import inspect
-        import buildingspy.development.regressiontest as r
-        import jinja2
-
         # Copy only models that need to be translated
         tra_data = []
         for dat in data:
             if dat[self._modelica_tool]['translate']:
                 tra_data.append(dat)
 
-        path_to_template = os.path.dirname(inspect.getfile(r))
-        env = jinja2.Environment(loader=jinja2.FileSystemLoader(path_to_template))
         with open(os.path.join(directory, "run.py"), mode="w", encoding="utf-8") as fil:
             models_underscore = []
             for dat in tra_data:
                 models_underscore.append(dat['model_name'].replace(".", "_"))
-            template = env.get_template("{}_run_all.template".format(self._modelica_tool))
+            template = _TEMPLATE_ENV.get_template("{}_run_all.template".format(self._modelica_tool))
             txt = template.render(models_underscore=sorted(models_underscore))
             # for the special case that no models need to be translated (for this process)
             # we need to add a python command. Otherwise the python file is not valid.
@@ -3208,7 +3220,7 @@ class Tester(object):
                 txt += "   import os;\n"
             fil.write(txt)
 
-        tem_mod = env.get_template("{}_run.template".format(self._modelica_tool))
+        tem_mod = _TEMPLATE_ENV.get_template("{}_run.template".format(self._modelica_tool))
 
         for dat in tra_data:
             model = dat['model_name']
@@ -3224,6 +3236,15 @@ class Tester(object):
                     dat[self._modelica_tool]['rtol'] = dat['tolerance']
                 else:
                     dat[self._modelica_tool]['rtol'] = 1E-6
+            # The results that are compared with the reference results are read
+            # from the binary result file, hence it must be written.
+            result_handling = dat[self._modelica_tool]['result_handling']
+            if result_variables and result_handling != 'binary':
+                self._reporter.writeWarning(
+                    "{}: Result handling '{}' does not write the results that are compared "
+                    "with the reference results. Using 'binary' instead.".format(
+                        model, result_handling))
+                result_handling = 'binary'
             # Note that if dat['mustSimulate'] == false, then only the FMU export is tested, but no
             # simulation should be done.
             # filter argument must respect glob syntax ([ is escaped with []]) + JModelica mat file
@@ -3231,6 +3252,7 @@ class Tester(object):
             txt = tem_mod.render(
                 model=model,
                 ncp=dat[self._modelica_tool]['ncp'],
+                result_handling=result_handling,
                 rtol=dat[self._modelica_tool]['rtol'],
                 solver=dat[self._modelica_tool]['solver'],
                 simulate=dat[self._modelica_tool]['simulate'] and dat['mustSimulate'],
@@ -3240,7 +3262,8 @@ class Tester(object):
                                re.sub(' ', '', x)) for x in result_variables]
             )
             file_name = os.path.join(directory, "{}.py".format(model.replace(".", "_")))
-            with open(file_name, mode="w", encoding="utf-8") as fil:
+            # Use a large buffer so that the script is written with a single system call.
+            with open(file_name, mode="w", encoding="utf-8", buffering=1 << 20) as fil:
                 fil.write(txt)
 
     def deleteTemporaryDirectories(self, delete):
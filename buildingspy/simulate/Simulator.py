@@ -1,23 +1,46 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-#
-# import from future to make Python2 behave like Python3
-from __future__ import absolute_import
-from __future__ import division
-from __future__ import print_function
-from __future__ import unicode_literals
-from future import standard_library
-standard_library.install_aliases()
-from builtins import *
-from io import open
-# end of from future import
-
-try:
-    # Python 2
-    basestring
-except NameError:
-    # Python 3 or newer
-    basestring = str
+import contextlib
+import datetime
+import errno
+import fnmatch
+import functools
+import getpass
+import hashlib
+import io
+import multiprocessing
+import os
+import re
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing.pool import ThreadPool
+
+import buildingspy.io.reporter as reporter
+
+# The operating system does not change while the module is used
+_IS_WINDOWS = os.name == "nt"
+
+# Marker of warnings and errors in the log file of Dymola
+_DYMOSIM_WARNING = "Warning:"
+_DYMOSIM_ERROR = "... Error message from dymosim"
+# Maximum number of errors that are reported from the log file of a simulation
+_MAX_REPORTED_ERRORS = 100
+# Number of files and directories above which a working directory is deleted with rm -rf
+_MIN_ENTRIES_FOR_RM = 1000
+# Number of declarations that are appended to a model instance
+# in one statement of the script ``modifiers.mos``
+_DECLARATIONS_PER_LINE = 20
+# Output files of the simulator, which may contain wildcards as used by fnmatch.
+# The patterns are compiled to one regular expression.
+_OUTPUT_FILES = ['buildlog.txt', 'dsfinal.txt', 'dsin.txt', 'dslog.txt',
+                 'dsmodel*', 'dymosim', 'dymosim.exe',
+                 'request.', 'status', 'failure', 'stop']
+_OUTPUT_FILES_REGEX = re.compile(
+    "|".join(fnmatch.translate(os.path.normcase(p)) for p in _OUTPUT_FILES))
 
 
 class Simulator(object):
@@ -27,30 +50,63 @@ class Simulator(object):
     :param simulator: The simulation engine. Currently, the only supported value is ``dymola``.
     :param outputDirectory: An optional output directory.
     :param packagePath: An optional path where the Modelica ``package.mo`` file is located.
+    :param sharedReporter: An optional :class:`buildingspy.io.reporter.Reporter`
+                           that is used instead of a new reporter.
 
     If the parameter ``outputDirectory`` is specified, then the
     output files and log files will be moved to this directory
     when the simulation is completed.
     Outputs from the python functions will be written to ``outputDirectory/BuildingsPy.log``.
 
+    If the parameter ``sharedReporter`` is specified, then the outputs are written
+    to the log file of this reporter, and no new log file is created. This avoids
+    creating a log file for each simulator if many simulators are used.
+    All simulators that share a reporter also share its number of errors and warnings.
+
     If the parameter ``packagePath`` is specified, the Simulator will copy this directory
     and all its subdirectories to a temporary directory when running the simulations.
+    To link rather than copy the package, see :meth:`~Simulator.linkPackage`.
 
     .. note:: Up to version 1.4, the environmental variable ``MODELICAPATH``
               has been used as the default value. This has been changed as
               ``MODELICAPATH`` can have multiple entries in which case it is not
               clear what entry should be used.
     """
-
-    def __init__(self, modelName, simulator, outputDirectory='.', packagePath=None):
-        import buildingspy.io.reporter as reporter
-        import os
+    # The attributes that are set by the constructor are stored in slots, which reduces
+    # the time to create an instance if many simulators are used, such as in parameter sweeps.
+    # __dict__ and __weakref__ are kept, so that other attributes can still be set,
+    # for example by mock.patch.object, and instances can still be referenced weakly.
+    __slots__ = ('__dict__',
+                 '__weakref__',
+                 'modelName',
+                 '_outputDir_',
+                 '_simulateDir_',
+                 '_translateDir_',
+                 '_packagePath',
+                 '_packagePathAbs',
+                 '_preProcessing_',
+                 '_postProcessing_',
+                 '_parameters_',
+                 '_modelModifiers_',
+                 '_simulator_',
+                 '_MODELICA_EXE',
+                 '_reporter',
+                 '_showProgressBar',
+                 '_showGUI',
+                 '_exitSimulator',
+                 '_translationCache_',
+                 '_linkPackage',
+                 '_reuseWorDir',
+                 '_sharedWorDir_',
+                 '_packageHash_',
+                 '_producedOutputs_')
+
+    def __init__(self, modelName, simulator, outputDirectory='.', packagePath=None,
+                 sharedReporter=None):
 
         # Check arguments and make output directory if needed
         if simulator != "dymola":
             raise ValueError("Argument 'simulator' needs to be set to 'dymola'.")
-        # Set log file name for python script
-        logFilNam = os.path.join(outputDirectory, "BuildingsPy.log")
 
         self.modelName = modelName
         self._outputDir_ = outputDirectory
@@ -59,8 +115,9 @@ class Simulator(object):
 
         # Check if the package Path parameter is correct
         self._packagePath = None
+        self._packagePathAbs = None
         if packagePath is None:
-            self.setPackagePath(os.path.abspath('.'))
+            self.setPackagePath(os.getcwd())
         else:
             self.setPackagePath(packagePath)
 
@@ -70,18 +127,33 @@ class Simulator(object):
         self._postProcessing_ = list()
         self._parameters_ = {}
         self._modelModifiers_ = list()
-        self._simulator_ = {}
-        self.setStartTime(0)
-        self.setStopTime(1)
-        self.setTolerance(1E-6)
-        self.setSolver("radau")
-        self.setResultFile(modelName)
-        self.setTimeOut(-1)
+        # If modelName=aa.bb.cc, then rpartition returns (aa.bb, ., cc),
+        # see setResultFile()
+        self._simulator_ = {'t0': 0,
+                            't1': 1,
+                            'eps': 1E-6,
+                            'solver': "radau",
+                            'resultFile': modelName.rpartition(".")[2],
+                            'timeout': -1}
         self._MODELICA_EXE = 'dymola'
-        self._reporter = reporter.Reporter(fileName=logFilNam)
+        if sharedReporter is None:
+            # Set log file name for python script
+            if outputDirectory == '.':
+                logFilNam = "BuildingsPy.log"
+            else:
+                logFilNam = os.path.join(outputDirectory, "BuildingsPy.log")
+            self._reporter = reporter.Reporter(fileName=logFilNam)
+        else:
+            self._reporter = sharedReporter
         self._showProgressBar = False
         self._showGUI = False
         self._exitSimulator = True
+        self._translationCache_ = None
+        self._linkPackage = False
+        self._reuseWorDir = False
+        self._sharedWorDir_ = None
+        self._packageHash_ = None
+        self._producedOutputs_ = []
 
     def setPackagePath(self, packagePath):
         """ Set the path specified by ``packagePath``.
@@ -92,27 +164,21 @@ class Simulator(object):
         If both conditions are satisfied, the path is set.
         Otherwise, a ``ValueError`` is raised.
         """
-        import os
 
         # Check whether the package Path parameter is correct
-        if not os.path.exists(packagePath):
-            msg = "Argument packagePath=%s does not exist." % packagePath
-            raise ValueError(msg)
-
-        if not os.path.isdir(packagePath):
-            msg = "Argument packagePath=%s must be a directory " % packagePath
-            msg += "containing a Modelica package."
-            raise ValueError(msg)
+        _validate_package_path(packagePath)
 
         # Check whether the file package.mo exists in the directory specified
         # fileMo = os.path.abspath(os.path.join(packagePath, "package.mo"))
         # if os.path.isfile(fileMo) == False:
-            # msg = "The directory '%s' does not contain the required " % packagePath
-            # msg +="file '%s'." %fileMo
-            # raise ValueError(msg)
+        #     msg = "The directory '%s' does not contain the required " % packagePath
+        #     msg +="file '%s'." %fileMo
+        #     raise ValueError(msg)
 
         # All the checks have been successfully passed
         self._packagePath = packagePath
+        # Absolute path, which is used for the working directory of the simulations
+        self._packagePathAbs = os.path.abspath(packagePath)
 
     def _createDirectory(self, directoryName):
         """ Creates the directory *directoryName*
@@ -123,15 +189,17 @@ class Simulator(object):
         argument is valid and write permissions exists, it creates the
         directory. Otherwise, a *ValueError* is raised.
         """
-        import os
 
         if directoryName != '.':
             if len(directoryName) == 0:
                 raise ValueError(
                     "Specified directory is not valid. Set to '.' for current directory.")
             # Try to create directory
-            if not os.path.exists(directoryName):
+            try:
                 os.makedirs(directoryName)
+            except FileExistsError:
+                if not os.path.isdir(directoryName):
+                    raise ValueError("'" + directoryName + "' exists and is not a directory.")
             # Check write permission
             if not os.access(directoryName, os.W_OK):
                 raise ValueError("Write permission to '" + directoryName + "' denied.")
@@ -269,7 +337,7 @@ class Simulator(object):
 
         The default start time is 0.
         """
-        self._simulator_.update(t0=t0)
+        self._simulator_['t0'] = t0
         return
 
     def setStopTime(self, t1):
@@ -279,7 +347,7 @@ class Simulator(object):
 
         The default stop time is 1.
         """
-        self._simulator_.update(t1=t1)
+        self._simulator_['t1'] = t1
         return
 
     def setTimeOut(self, sec):
@@ -290,7 +358,7 @@ class Simulator(object):
         The default value is -1, which means that the simulation will
         never be killed.
         """
-        self._simulator_.update(timeout=sec)
+        self._simulator_['timeout'] = sec
         return
 
     def setTolerance(self, eps):
@@ -300,7 +368,7 @@ class Simulator(object):
 
         The default solver tolerance is 1E-6.
         """
-        self._simulator_.update(eps=eps)
+        self._simulator_['eps'] = eps
         return
 
     def setSolver(self, solver):
@@ -310,7 +378,7 @@ class Simulator(object):
 
         The default solver is *radau*.
         """
-        self._simulator_.update(solver=solver)
+        self._simulator_['solver'] = solver
         return
 
     def setNumberOfIntervals(self, n):
@@ -320,7 +388,7 @@ class Simulator(object):
 
         The default is unspecified, which defaults by Dymola to 500.
         """
-        self._simulator_.update(numberOfIntervals=n)
+        self._simulator_['numberOfIntervals'] = n
         return
 
     def setResultFile(self, resultFile):
@@ -329,10 +397,9 @@ class Simulator(object):
         :param resultFile: The name of the result file (without extension).
 
         """
-        # If resultFile=aa.bb.cc, then split returns [aa, bb, cc]
+        # If resultFile=aa.bb.cc, then rpartition returns (aa.bb, ., cc)
         # This is needed to get the short model name
-        rs = resultFile.split(".")
-        self._simulator_.update(resultFile=rs[len(rs) - 1])
+        self._simulator_['resultFile'] = resultFile.rpartition(".")[2]
         return
 
     def exitSimulator(self, exitAfterSimulation=True):
@@ -349,54 +416,349 @@ class Simulator(object):
         self._exitSimulator = exitAfterSimulation
         return
 
-    def _get_dymola_commands(self, working_directory, log_file, model_name, translate_only=False):
+    def linkPackage(self, link=True):
+        """ Sets whether the package is linked to the working directory.
+
+        :param link: Set to ``True`` to create symbolic links to the package
+                     rather than hard-linking or copying its files.
+
+        If enabled, the working directory of a simulation contains a symbolic link
+        for each subdirectory of the package, for each ``*.mo`` file in its
+        top-level directory and for ``package.order``. Hence, the package is
+        not copied. Other files in the top-level directory are copied, as the
+        simulator writes its output files to this directory.
+        If symbolic links cannot be created, for example on Windows without the
+        required privilege, then the files are hard-linked or copied.
+
+        By default, the package is not linked, and the working directory is isolated
+        from the package, see :meth:`~Simulator.simulate`.
+
+        .. note:: As the links point to the original package, changes to the package
+                  while the simulation runs are seen by the simulator, and pre-processing
+                  and post-processing statements that write files of the package
+                  modify the original package. Only enable this if the package
+                  is not modified while simulations run.
+        """
+        self._linkPackage = link
+        return
+
+    def reuseWorkingDirectory(self, reuse=True):
+        """ Sets whether the working directory is reused by all simulations.
+
+        :param reuse: Set to ``True`` to reuse the working directory.
+
+        By default, each call of :meth:`~Simulator.simulate` clones the package
+        to a new temporary directory, which is deleted after the simulation.
+        If the working directory is reused, then the package is cloned only
+        for the first simulation, and each simulation runs in its own
+        subdirectory, which is deleted after the simulation.
+        The package is cloned again if the package path changed.
+        Call :meth:`~Simulator.deleteSimulateDirectory` to delete
+        the working directory after the last simulation.
+
+        .. note:: As the package is only cloned once, changes to the package
+                  after the first simulation may not be seen by later simulations,
+                  unless the package is linked, see :meth:`~Simulator.linkPackage`.
+        """
+        self._reuseWorDir = reuse
+        return
+
+    def useTranslationCache(self, use=True, cacheDirectory=None):
+        """ Enables or disables the cache for translated models.
+
+        :param use: Set to ``False`` to disable the cache.
+        :param cacheDirectory: Directory where the translated models are stored.
+                               If ``None``, then ``~/.buildingspy/cache`` is used.
+
+        If the cache is enabled, then :meth:`~Simulator.simulate` stores the
+        executable ``dymosim`` and its input file ``dsin.txt`` in a subdirectory
+        of ``cacheDirectory``. The name of this subdirectory is a hash of the
+        model name, the parameters, the model modifiers, the pre-processing
+        statements, the simulator settings, the simulator executable and the
+        modification times of all ``*.mo`` files in the package path.
+        If a later simulation has the same hash, then the cached ``dymosim``
+        is run directly, which avoids the translation of the model.
+
+        .. note:: If a cached model is simulated, then Dymola is not started
+                  and hence the post-processing statements are not executed.
+
+        .. note:: The modification times of the ``*.mo`` files are read once for
+                  each package path. If the package is modified while this
+                  simulator is used, call this method again so that they are read again.
+
+        .. warning:: Do not use the cache for models that read files of the package,
+                     such as weather files or tables that are accessed through
+                     ``loadResource`` or ``modelica://`` URIs. When such a model is
+                     translated, these URIs are resolved to absolute paths in the
+                     working directory, and that directory is deleted after the
+                     simulation. A cached model therefore fails when it is run again.
+
+        By default, the cache is disabled.
+        """
+
+        if use:
+            if cacheDirectory is None:
+                cacheDirectory = os.path.join(os.path.expanduser("~"), ".buildingspy", "cache")
+            self._translationCache_ = cacheDirectory
+        else:
+            self._translationCache_ = None
+        self._packageHash_ = None
+        return
+
+    def _get_translation_hash(self, model_name):
+        """ Returns a hash that identifies the translated model.
+
+        :param model_name: The model instance, including all parameters and modifiers.
+        """
+        sha = hashlib.sha256()
+        # Executable of the simulator. Its location and time stamp change if
+        # a new version is installed.
+        exe = shutil.which(self._MODELICA_EXE)
+        if exe is None:
+            sha.update(self._MODELICA_EXE.encode("utf-8"))
+        else:
+            exe = os.path.realpath(exe)
+            sha.update("{}:{}".format(exe, os.stat(exe).st_mtime).encode("utf-8"))
+        # Model and simulator settings. The name of the result file and the
+        # time out do not affect the translation.
+        settings = sorted((k, v) for k, v in self._simulator_.items()
+                          if k not in ['resultFile', 'timeout'])
+        sha.update(repr((model_name, self._preProcessing_, settings)).encode("utf-8"))
+        # Modelica source files of the package
+        sha.update(self._get_package_hash().encode("utf-8"))
+        return sha.hexdigest()
+
+    def _get_package_hash(self):
+        """ Returns a hash of the names and modification times of the ``*.mo`` files
+            of the package.
+
+        The package is only scanned the first time this method is called
+        for a package path, see :meth:`~Simulator.useTranslationCache`.
+        """
+        pacPat = self._packagePathAbs
+        if self._packageHash_ is None or self._packageHash_[0] != pacPat:
+            sha = hashlib.sha256()
+            for root, dirs, files in os.walk(pacPat):
+                dirs.sort()
+                for fil in sorted(files):
+                    if fil.endswith(".mo"):
+                        filNam = os.path.join(root, fil)
+                        sha.update("{}:{}".format(os.path.relpath(filNam, pacPat),
+                                                  os.stat(filNam).st_mtime).encode("utf-8"))
+            self._packageHash_ = (pacPat, sha.hexdigest())
+        return self._packageHash_[1]
+
+    @staticmethod
+    def _get_dymosim_name():
+        """ Returns the name of the executable generated by Dymola.
+        """
+        if _IS_WINDOWS:
+            return "dymosim.exe"
+        return "dymosim"
+
+    def _is_in_translation_cache(self, cacheDir):
+        """ Returns ``True`` if the translated model is in ``cacheDir``.
+
+        :param cacheDir: The directory of the translation cache for this model.
+        """
+        return all(os.path.isfile(os.path.join(cacheDir, fil))
+                   for fil in [self._get_dymosim_name(), 'dsin.txt'])
+
+    def _restore_from_translation_cache(self, cacheDir, worDir):
+        """ Copies the translated model from ``cacheDir`` to ``worDir``.
+
+        :param cacheDir: The directory of the translation cache for this model.
+        :param worDir: The working directory.
+        :return: ``True`` if the model was found in the cache, ``False`` otherwise.
+        """
+        if not self._is_in_translation_cache(cacheDir):
+            return False
+        try:
+            for fil in [self._get_dymosim_name(), 'dsin.txt']:
+                shutil.copy2(os.path.join(cacheDir, fil), os.path.join(worDir, fil))
+        except FileNotFoundError:
+            # The cache entry was removed while it was copied
+            return False
+        return True
+
+    def _store_in_translation_cache(self, cacheDir, worDir):
+        """ Copies the translated model from ``worDir`` to ``cacheDir``.
+
+        :param cacheDir: The directory of the translation cache for this model.
+        :param worDir: The working directory.
+
+        The files are first copied to a temporary directory, which is then
+        renamed to ``cacheDir``. Hence, concurrent simulations never see a
+        partially written cache entry.
+        """
+        filLis = [self._get_dymosim_name(), 'dsin.txt']
+        for fil in filLis:
+            if not os.path.isfile(os.path.join(worDir, fil)):
+                return
+        try:
+            self._createDirectory(self._translationCache_)
+            temDir = tempfile.mkdtemp(dir=self._translationCache_)
+            for fil in filLis:
+                shutil.copy2(os.path.join(worDir, fil), os.path.join(temDir, fil))
+            try:
+                os.rename(temDir, cacheDir)
+            except OSError:
+                # Another process stored the same model in the meantime.
+                shutil.rmtree(temDir, ignore_errors=True)
+        except (IOError, OSError) as e:
+            self._reporter.writeError("Failed to store translated model in '" +
+                                      cacheDir + "': " + str(e))
+
+    def _get_dymola_commands(self, working_directory, log_file, runs, translate_only=False,
+                             package_file="package.mo"):
         """ Returns a string that contains all the commands required
             to run or translate the model.
 
         :param working_directory: The working directory for the simulation or translation.
         :param log_file: The name of the log file that will be written by Dymola.
+        :param runs: A list of tuples ``(declarations, result_file)``, with one entry
+                     for each simulation. For a translation, only the declarations of the
+                     first entry are used.
         :param translate_only: Set to ```True``` to only translate the model without a simulation.
+        :param package_file: The file ``package.mo`` of the package,
+                             relative to the working directory.
+
+        If any run has parameter declarations or model modifiers, the model instances
+        are defined in the script ``modifiers.mos``, which needs to be written to the
+        working directory, see :meth:`~Simulator._write_modifier_script`.
         """
-        s = """
-// File autogenerated by _get_dymola_commands
-// Do not edit.
-//cd("{working_directory}");
-Modelica.Utilities.Files.remove("{log_file}");
-openModel("package.mo");
-OutputCPUtime:=true;
-""".format(working_directory=working_directory,
-           log_file=log_file)
+        # A package outside of the working directory is opened without changing
+        # to its directory, as the simulation writes its files to the current directory.
+        if package_file == "package.mo":
+            openModel = 'openModel("{0}");'.format(package_file)
+        else:
+            openModel = 'openModel("{0}", changeDirectory=false);'.format(package_file)
+        # The script is assembled as a list of lines that are joined at the end,
+        # as appending to a string copies the whole script for each statement.
+        parts = ["",
+                 "// File autogenerated by _get_dymola_commands",
+                 "// Do not edit.",
+                 '//cd("{0}");'.format(working_directory),
+                 'Modelica.Utilities.Files.remove("{0}");'.format(log_file),
+                 openModel,
+                 "OutputCPUtime:=true;"]
         # Pre-processing commands
-        for prePro in self._preProcessing_:
-            s += prePro + '\n'
+        parts.extend(self._preProcessing_)
 
-        s += "modelInstance={0};\n".format(model_name)
+        # Model instances
+        if translate_only:
+            runs = runs[:1]
+        if self._has_declarations(runs):
+            parts.append('RunScript("modifiers.mos");')
+        else:
+            parts.extend(self._get_modifier_commands(runs))
 
         if translate_only:
-            s += "translateModel(modelInstance);\n"
+            parts.append("translateModel(modelInstance0);")
         else:
             # Create string for numberOfIntervals
             intervals = ""
             if 'numberOfIntervals' in self._simulator_:
                 intervals = ", numberOfIntervals={0}".format(
                     self._simulator_.get('numberOfIntervals'))
-            s += """
-simulateModel(modelInstance, startTime={start_time}, stopTime={stop_time}, method="{method}", tolerance={tolerance}, resultFile="{result_file}"{others});
-""".format(start_time=self._simulator_.get('t0'),
-                stop_time=self._simulator_.get('t1'),
-                method=self._simulator_.get('solver'),
-                tolerance=self._simulator_.get('eps'),
-                result_file=self._simulator_.get('resultFile'),
-                others=intervals)
+            for iRun, (_, result_file) in enumerate(runs):
+                parts.append("")
+                parts.append(
+                    'simulateModel(modelInstance{iRun}, startTime={start_time}, stopTime={stop_time}, method="{method}", tolerance={tolerance}, resultFile="{result_file}"{others});'.format(
+                        start_time=self._simulator_.get('t0'),
+                        stop_time=self._simulator_.get('t1'),
+                        method=self._simulator_.get('solver'),
+                        tolerance=self._simulator_.get('eps'),
+                        result_file=result_file,
+                        others=intervals,
+                        iRun=iRun))
 
         # Post-processing commands
-        for posPro in self._postProcessing_:
-            s += posPro + '\n'
+        parts.extend(self._postProcessing_)
 
-        s += """savelog("{0}");\n""".format(log_file)
+        parts.append('savelog("{0}");'.format(log_file))
         if self._exitSimulator:
-            s += "Modelica.Utilities.System.exit();\n"
-        return s
+            parts.append("Modelica.Utilities.System.exit();")
+        parts.append("")
+        return "\n".join(parts)
+
+    def _get_declarations(self, parameters=None):
+        """ Returns a list with all parameter declarations
+            and the package redeclarations.
+
+        :param parameters: A dictionary with parameter values, or ``None``
+                           to use the parameters of this simulator.
+        """
+        if parameters is None:
+            parameters = self._parameters_
+        if not parameters:
+            # Nothing to declare, the modifiers can be used as they are
+            return list(self._modelModifiers_)
+        dec = self._declare_parameters(parameters)
+        dec.extend(self._modelModifiers_)
+        return dec
+
+    def _get_model_instance(self, declarations):
+        """ Returns the model instance with all declarations as a quoted string.
+
+        :param declarations: A list with the parameter declarations and model modifiers.
+
+        If there are no declarations, the model name is returned without parentheses,
+        as Dymola otherwise treats the model instance as a different model.
+        """
+        if not declarations:
+            return '"{mn}"'.format(mn=self.modelName)
+        return '"{mn}({dec})"'.format(mn=self.modelName, dec=','.join(declarations))
+
+    @staticmethod
+    def _has_declarations(runs):
+        """ Returns ``True`` if any entry of ``runs`` has declarations.
+        """
+        return any(declarations for declarations, _ in runs)
+
+    def _get_modifier_commands(self, runs):
+        """ Returns a list with the statements that define the variables
+            ``modelInstance0``, ``modelInstance1``, ... for all entries of ``runs``.
+
+        :param runs: A list of tuples ``(declarations, result_file)``.
+
+        The declarations are appended in chunks of a few declarations,
+        as Dymola limits the length of a line in a script.
+        """
+        lines = []
+        for iRun, (declarations, _) in enumerate(runs):
+            var = "modelInstance{0}".format(iRun)
+            if not declarations:
+                lines.append('{var}="{mn}";'.format(var=var, mn=self.modelName))
+                continue
+            lines.append('{var}="{mn}(";'.format(var=var, mn=self.modelName))
+            for iSta in range(0, len(declarations), _DECLARATIONS_PER_LINE):
+                lines.append('{var}={var} + "{sep}{dec}";'.format(
+                    var=var,
+                    sep="," if iSta > 0 else "",
+                    dec=",".join(declarations[iSta:iSta + _DECLARATIONS_PER_LINE])))
+            lines.append('{var}={var} + ")";'.format(var=var))
+        return lines
+
+    def _write_modifier_script(self, worDir, runs):
+        """ Writes the script ``modifiers.mos`` that defines the model instances
+            to the directory ``worDir``.
+
+        :param worDir: The working directory.
+        :param runs: A list of tuples ``(declarations, result_file)``.
+
+        If no run has declarations, the model instances are defined
+        in the run script and no file is written.
+        """
+        if not self._has_declarations(runs):
+            return
+        lines = ["// File autogenerated by _write_modifier_script",
+                 "// Do not edit."]
+        lines.extend(self._get_modifier_commands(runs))
+        lines.append("")
+        with open(os.path.join(worDir, "modifiers.mos"), mode="w",
+                  encoding="utf-8", buffering=1 << 20) as fil:
+            fil.write("\n".join(lines))
 
     def simulate(self):
         """Simulates the model.
@@ -416,50 +778,145 @@ simulateModel(modelInstance, startTime={start_time}, stopTime={stop_time}, metho
         an error message.
 
         """
-        import os
-        import shutil
+        self._simulate([(self._get_declarations(), self._simulator_.get('resultFile'))])
 
-        # Delete dymola output files
-        self.deleteOutputFiles()
+    def simulateBatch(self, parameterSets):
+        """Simulates the model for several sets of parameter values
+        in one session of the simulator.
 
-        # Get directory name. This ensures for example that if the directory is called xx/Buildings
-        # then the simulations will be done in tmp??/Buildings
-        worDir = self._create_worDir()
-        self._simulateDir_ = worDir
-        # Copy directory
-        shutil.copytree(os.path.abspath(self._packagePath), worDir,
-                        ignore=shutil.ignore_patterns('*.svn', '*.git'))
+        :param parameterSets: A list of dictionaries with parameter values.
 
-        # Construct the model instance with all parameter values
-        # and the package redeclarations
-        dec = self._declare_parameters()
-        dec.extend(self._modelModifiers_)
+        Usage: Type
+           >>> from buildingspy.simulate.Simulator import Simulator
+           >>> s=Simulator("myPackage.myModel", "dymola", packagePath="buildingspy/tests/MyModelicaLibrary")
+           >>> s.addParameters({'PID.k': 1.0})
+           >>> s.simulateBatch([{'PID.Ti': 10.0}, {'PID.Ti': 100.0}]) # doctest: +SKIP
+
+        This will simulate the model twice, with ``PID.k=1`` and ``PID.Ti=10``,
+        and with ``PID.k=1`` and ``PID.Ti=100``. The parameters of each
+        entry of ``parameterSets`` are added to the parameters that were
+        set with :meth:`~Simulator.addParameters`.
+        The results of the ``i``-th entry of ``parameterSets`` are stored in the file
+        ``resultFile_i.mat``, where ``resultFile`` is the name set with
+        :meth:`~Simulator.setResultFile`.
+
+        Other than calling :meth:`~Simulator.simulate` for each parameter set,
+        this method copies the package and starts the simulator only once.
+        The translation cache, see :meth:`~Simulator.useTranslationCache`,
+        is not used by this method.
+        If ``parameterSets`` is empty, then nothing is simulated.
+        """
+        if len(parameterSets) == 0:
+            return
+        runs = []
+        for i, parameters in enumerate(parameterSets):
+            par = dict(self._parameters_)
+            par.update(parameters)
+            runs.append((self._get_declarations(par),
+                         "{}_{}".format(self._simulator_.get('resultFile'), i)))
+        self._simulate(runs)
 
-        mi = '"{mn}({dec})"'.format(mn=self.modelName, dec=','.join(dec))
+    def _simulate(self, runs):
+        """Simulates the model for all entries of ``runs``.
 
-        try:
-            # Write the Modelica script
-            runScriptName = os.path.join(worDir, "run.mos")
-            with open(runScriptName, mode="w", encoding="utf-8") as fil:
-                fil.write(self._get_dymola_commands(
-                    working_directory=worDir,
-                    log_file="simulator.log",
-                    model_name=mi,
-                    translate_only=False))
-            # Copy files to working directory
+        :param runs: A list of tuples ``(declarations, result_file)``, with one entry
+                     for each simulation.
 
-            # Run simulation
-            self._runSimulation(runScriptName,
-                                self._simulator_.get('timeout'),
-                                worDir)
-            self._check_simulation_errors(worDir)
-            self._copyResultFiles(worDir)
-            self._deleteTemporaryDirectory(worDir)
+        """
+
+        # Delete dymola output files
+        self.deleteOutputFiles()
+
+        cacheDir = None
+        if self._translationCache_ is not None and len(runs) == 1:
+            cacheDir = os.path.join(self._translationCache_,
+                                    self._get_translation_hash(
+                                        self._get_model_instance(runs[0][0])))
+        # The translated model is run without the package. Whether it is in the cache
+        # is decided by the restore, as the cache entry may have been removed meanwhile.
+        restored = False
+        if cacheDir is not None and self._is_in_translation_cache(cacheDir):
+            worDir = self._create_worDir()
+            os.makedirs(worDir)
+            restored = self._restore_from_translation_cache(cacheDir, worDir)
+            if restored:
+                self._simulateDir_ = worDir
+            else:
+                self._deleteTemporaryDirectory(worDir)
+
+        useSharedDir = self._reuseWorDir and not restored
+        packageFile = "package.mo"
+        if useSharedDir:
+            # Simulate in a new subdirectory of the shared working directory
+            worDir = tempfile.mkdtemp(prefix="run-", dir=self._get_shared_worDir())
+            packageFile = "../package.mo"
+        elif not restored:
+            # Get directory name. This ensures for example that if the directory is called
+            # xx/Buildings then the simulations will be done in tmp??/Buildings
+            worDir = self._create_worDir()
+            self._simulateDir_ = worDir
+            # Copy directory
+            self._clone_package(self._packagePathAbs, worDir)
+
+        try:
+            if restored:
+                # Run the translated model without starting Dymola
+                self._runCommand([os.path.join(worDir, self._get_dymosim_name()),
+                                  "dsin.txt",
+                                  runs[0][1] + ".mat"],
+                                 self._simulator_.get('timeout'),
+                                 worDir)
+                self._check_simulation_errors(worDir, log_file='dslog.txt')
+            else:
+                # Write the Modelica script. The large buffer lets the script be
+                # written with a single system call when the file is closed.
+                self._write_modifier_script(worDir, runs)
+                runScriptName = os.path.join(worDir, "run.mos")
+                with open(runScriptName, mode="w", encoding="utf-8", buffering=1 << 20) as fil:
+                    fil.write(self._get_dymola_commands(
+                        working_directory=worDir,
+                        log_file="simulator.log",
+                        runs=runs,
+                        translate_only=False,
+                        package_file=packageFile))
+                # Copy files to working directory
+
+                # Run simulation
+                self._runSimulation(runScriptName,
+                                    self._simulator_.get('timeout'),
+                                    worDir)
+                self._check_simulation_errors(worDir)
+                if cacheDir is not None:
+                    self._store_in_translation_cache(cacheDir, worDir)
+            # Remember the output files, so that deleteOutputFiles() need not scan for them
+            self._producedOutputs_ = [ent.name for ent in os.scandir(worDir)
+                                      if _OUTPUT_FILES_REGEX.match(os.path.normcase(ent.name))]
+            self._copyResultFiles(worDir, [result_file for _, result_file in runs])
+            if useSharedDir:
+                _remove_tree(worDir)
+            else:
+                self._deleteTemporaryDirectory(worDir)
         except Exception as e:  # Catch all possible exceptions
             em = "Simulation failed in '{worDir}'\n   Exception: {exc}.\n   You need to delete the directory manually.\n".format(
                 worDir=worDir, exc=str(e))
             self._reporter.writeError(em)
 
+    def _get_shared_worDir(self):
+        """ Returns the working directory that is reused by the simulations,
+            and creates it if it does not exist or if the package path changed.
+        """
+        if self._sharedWorDir_ is not None:
+            src, worDir = self._sharedWorDir_
+            if src == self._packagePathAbs and os.path.isdir(worDir):
+                return worDir
+            self._deleteTemporaryDirectory(worDir)
+
+        worDir = self._create_worDir()
+        self._clone_package(self._packagePathAbs, worDir)
+        self._sharedWorDir_ = (self._packagePathAbs, worDir)
+        self._simulateDir_ = worDir
+        return worDir
+
     def translate(self):
         """Translates the model.
 
@@ -478,8 +935,6 @@ simulateModel(modelInstance, startTime={start_time}, stopTime={stop_time}, metho
         an error message.
 
         """
-        import os
-        import shutil
 
         # Delete dymola output files
         self.deleteOutputFiles()
@@ -489,23 +944,22 @@ simulateModel(modelInstance, startTime={start_time}, stopTime={stop_time}, metho
         worDir = self._create_worDir()
         self._translateDir_ = worDir
         # Copy directory
-        shutil.copytree(os.path.abspath(self._packagePath), worDir)
+        self._clone_package(self._packagePathAbs, worDir)
 
         # Construct the model instance with all parameter values
         # and the package redeclarations
-        dec = self._declare_parameters()
-        dec.extend(self._modelModifiers_)
-
-        mi = '"{mn}({dec})"'.format(mn=self.modelName, dec=','.join(dec))
+        runs = [(self._get_declarations(), None)]
 
         try:
-            # Write the Modelica script
+            self._write_modifier_script(worDir, runs)
+            # Write the Modelica script. The large buffer lets the script be
+            # written with a single system call when the file is closed.
             runScriptName = os.path.join(worDir, "run_translate.mos")
-            with open(runScriptName, mode="w", encoding="utf-8") as fil:
+            with open(runScriptName, mode="w", encoding="utf-8", buffering=1 << 20) as fil:
                 fil.write(self._get_dymola_commands(
                     working_directory=worDir,
                     log_file="translator.log",
-                    model_name=mi,
+                    runs=runs,
                     translate_only=True))
             # Copy files to working directory
 
@@ -518,21 +972,132 @@ simulateModel(modelInstance, startTime={start_time}, stopTime={stop_time}, metho
                                       "   You need to delete the directory manually.")
             raise
 
+    def _clone_package(self, src, dst):
+        """ Clones the package directory ``src`` to ``dst``.
+
+        :param src: The directory that contains the package.
+        :param dst: The directory to which the package will be cloned. It must not exist.
+
+        As the simulator only reads the Modelica files of the package, the ``*.mo`` files
+        and ``package.order`` are hard-linked rather than copied. All other files, such as
+        the files in ``Resources``, are copied, as a simulation or its pre-processing and
+        post-processing statements may write to them, which would otherwise change the
+        files of the package.
+        If hard links are not supported, for example because ``src`` and ``dst`` are on
+        different file systems, then the files are copied.
+        Files and directories whose name ends with ``.svn`` or ``.git`` are skipped.
+
+        If :meth:`~Simulator.linkPackage` is enabled, the package is linked
+        with ``_link_package`` instead.
+        """
+        if self._linkPackage:
+            try:
+                self._link_package(src, dst)
+                return
+            except OSError:
+                # Symbolic links are not supported, clone the files instead.
+                shutil.rmtree(dst, ignore_errors=True)
+
+        canLink = True
+        os.makedirs(dst)
+        stack = [(src, dst)]
+        while stack:
+            srcDir, dstDir = stack.pop()
+            for ent in os.scandir(srcDir):
+                if ent.name.endswith(('.svn', '.git')):
+                    continue
+                dstNam = os.path.join(dstDir, ent.name)
+                if ent.is_dir():
+                    os.mkdir(dstNam)
+                    stack.append((ent.path, dstNam))
+                elif canLink and (ent.name.endswith('.mo') or ent.name == 'package.order'):
+                    try:
+                        os.link(ent.path, dstNam)
+                    except OSError:
+                        # Hard links are not supported, copy all remaining files.
+                        canLink = False
+                        shutil.copy2(ent.path, dstNam)
+                else:
+                    shutil.copy2(ent.path, dstNam)
+
+    def _link_package(self, src, dst):
+        """ Links the package directory ``src`` to ``dst``.
+
+        :param src: The directory that contains the package.
+        :param dst: The directory in which the links will be created. It must not exist.
+
+        For each subdirectory of ``src``, each ``*.mo`` file and ``package.order``,
+        a symbolic link is created in ``dst``. Other files are copied, as the
+        simulator writes its output files to ``dst``.
+        Files and directories whose name ends with ``.svn`` or ``.git`` are skipped.
+        """
+        os.makedirs(dst)
+        for ent in os.scandir(src):
+            if ent.name.endswith(('.svn', '.git')):
+                continue
+            dstNam = os.path.join(dst, ent.name)
+            isDir = ent.is_dir()
+            if isDir or ent.name.endswith('.mo') or ent.name == 'package.order':
+                os.symlink(ent.path, dstNam, target_is_directory=isDir)
+            else:
+                shutil.copy2(ent.path, dstNam)
+
     def deleteOutputFiles(self):
         """ Deletes the output files of the simulator.
+
+        After a simulation, only the output files that the simulator produced
+        in the working directory are deleted. Otherwise, all files whose names
+        match the output files of the simulator are deleted.
         """
-        filLis = ['buildlog.txt', 'dsfinal.txt', 'dsin.txt', 'dslog.txt',
-                  'dsmodel*', 'dymosim', 'dymosim.exe',
-                  str(self._simulator_.get('resultFile')) + '.mat',
-                  'request.', 'status', 'failure', 'stop']
-        self._deleteFiles(filLis)
+        fileNames = [str(self._simulator_.get('resultFile')) + '.mat']
+        if self._producedOutputs_:
+            self._delete_existing_files(os.curdir, self._producedOutputs_ + fileNames)
+        else:
+            self._delete_matching_files(os.curdir, fileNames)
+
+    def _delete_existing_files(self, directory, fileNames):
+        """ Deletes the files ``fileNames`` in ``directory``.
+
+        :param directory: The directory that contains the files.
+        :param fileNames: A list of file names to be deleted.
+
+        Files that do not exist are skipped.
+        """
+        for fil in fileNames:
+            filNam = os.path.join(directory, fil)
+            try:
+                os.remove(filNam)
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    self._reporter.writeError(
+                        "Failed to delete '" + filNam + "' : " + e.strerror)
+
+    def _delete_matching_files(self, directory, fileNames):
+        """ Deletes the output files of the simulator in ``directory``.
+
+        :param directory: The directory that contains the files.
+        :param fileNames: A list of additional file names to be deleted.
+
+        The directory is read once, and each file is deleted if its name
+        matches ``_OUTPUT_FILES`` or if it is in ``fileNames``.
+        """
+        fileNames = set(os.path.normcase(f) for f in fileNames)
+        for ent in os.scandir(directory):
+            nam = os.path.normcase(ent.name)
+            if nam in fileNames or _OUTPUT_FILES_REGEX.match(nam):
+                try:
+                    if not ent.is_dir():
+                        os.remove(ent.path)
+                except OSError as e:
+                    self._reporter.writeError(
+                        "Failed to delete '" + ent.path + "' : " + e.strerror)
 
     def deleteLogFiles(self):
         """ Deletes the log files of the Python simulator, e.g. the
             files ``BuildingsPy.log``, ``run.mos`` and ``simulator.log``.
         """
         filLis = ['BuildingsPy.log', 'run.mos', 'run_simulate.mos',
-                  'run_translate.mos', 'simulator.log', 'translator.log']
+                  'run_translate.mos', 'modifiers.mos', 'simulator.log', 'translator.log']
         self._deleteFiles(filLis)
 
     def _deleteFiles(self, fileList):
@@ -541,14 +1106,7 @@ simulateModel(modelInstance, startTime={start_time}, stopTime={stop_time}, metho
         :param fileList: List of files to be deleted.
 
         """
-        import os
-
-        for fil in fileList:
-            try:
-                if os.path.exists(fil):
-                    os.remove(fil)
-            except OSError as e:
-                self._reporter.writeError("Failed to delete '" + fil + "' : " + e.strerror)
+        self._delete_existing_files(os.curdir, fileList)
 
     def showGUI(self, show=True):
         """ Call this function to show the GUI of the simulator.
@@ -563,25 +1121,26 @@ simulateModel(modelInstance, startTime={start_time}, stopTime={stop_time}, metho
 
         This method may be used to print logging information.
         """
-        import time
         self._reporter.writeOutput("Model name       = " + self.modelName + '\n' +
                                    "Output directory = " + self._outputDir_ + '\n' +
                                    "Time             = " + time.asctime() + '\n')
         return
 
-    def _copyResultFiles(self, srcDir):
+    def _copyResultFiles(self, srcDir, resultFiles=None):
         """ Copies the output files of the simulator.
 
         :param srcDir: The source directory of the files
+        :param resultFiles: A list with the names of the result files (without extension),
+                            or ``None`` to copy the result file set by :meth:`~Simulator.setResultFile`.
 
         """
-        import shutil
-        import os
 
         if self._outputDir_ != '.':
             self._createDirectory(self._outputDir_)
-        filLis = ['run_simulate.mos', 'run_translate.mos', 'run.mos', 'translator.log',
-                  'simulator.log', 'dslog.txt', self._simulator_.get('resultFile') + '.mat']
+        if resultFiles is None:
+            resultFiles = [self._simulator_.get('resultFile')]
+        filLis = ['run_simulate.mos', 'run_translate.mos', 'run.mos', 'modifiers.mos',
+                  'translator.log', 'simulator.log', 'dslog.txt'] + [r + '.mat' for r in resultFiles]
         for fil in filLis:
             srcFil = os.path.join(srcDir, fil)
             newFil = os.path.join(self._outputDir_, fil)
@@ -600,54 +1159,42 @@ simulateModel(modelInstance, startTime={start_time}, stopTime={stop_time}, metho
         :param srcDir: The name of the working directory.
 
         """
-        import shutil
-        import os
 
         if worDir is None:
             return
+        # Nothing to delete if the working directory does not exist
+        try:
+            os.lstat(worDir)
+        except FileNotFoundError:
+            return
 
         # Walk one level up, since we appended the name of the current directory
         # to the name of the working directory
         dirNam = os.path.split(worDir)[0]
-        # Make sure we don't delete a root directory
-        if dirNam.find('tmp-simulator-') == -1:
+        # Make sure we only delete a directory created by _create_worDir
+        if not _is_temporary_directory(dirNam):
             self._reporter.writeError(
                 "Failed to delete '" +
                 dirNam +
                 "' as it does not seem to be a valid directory name.")
         else:
             try:
-                if os.path.exists(worDir):
-                    shutil.rmtree(dirNam)
+                _remove_tree(dirNam)
             except IOError as e:
                 self._reporter.writeError("Failed to delete '" +
                                           worDir + ": " + e.strerror)
 
     def deleteSimulateDirectory(self):
-        """ Deletes the simulate directory. Can be called when simulation failed.
+        """ Deletes the simulate directory. Can be called when simulation failed,
+            or after the last simulation if the working directory is reused.
         """
         self._deleteTemporaryDirectory(self._simulateDir_)
+        if self._sharedWorDir_ is not None:
+            self._deleteTemporaryDirectory(self._sharedWorDir_[1])
+            self._sharedWorDir_ = None
 
     def _isExecutable(self, program):
-        import os
-        import platform
-
-        def is_exe(fpath):
-            return os.path.exists(fpath) and os.access(fpath, os.X_OK)
-
-        # Add .exe, which is needed on Windows 7 to test existence
-        # of the program
-        if platform.system() == "Windows":
-            program = program + ".exe"
-
-        if is_exe(program):
-            return True
-        else:
-            for path in os.environ["PATH"].split(os.pathsep):
-                exe_file = os.path.join(path, program)
-                if is_exe(exe_file):
-                    return True
-        return False
+        return _find_executable(program, os.environ.get("PATH", ""))
 
     def _runSimulation(self, mosFile, timeout, directory):
         """Runs a model translation or simulation.
@@ -657,22 +1204,25 @@ simulateModel(modelInstance, startTime={start_time}, stopTime={stop_time}, metho
         :param directory: The working directory
 
         """
-
-        import sys
-        import subprocess
-        import time
-        import datetime
-
         # Remove the working directory from the mosFile name.
         # This is needed for example if the simulation is run in a docker,
         # which may have a different file structure than the host.
-        mo_fil = mosFile.replace(directory, ".")
+        mo_fil = os.path.join(os.curdir, os.path.relpath(mosFile, directory))
         # List of command and arguments
         if self._showGUI:
             cmd = [self._MODELICA_EXE, mo_fil]
         else:
             cmd = [self._MODELICA_EXE, mo_fil, "/nowindow"]
+        self._runCommand(cmd, timeout, directory)
+
+    def _runCommand(self, cmd, timeout, directory):
+        """Runs a command, such as the simulator or the simulation executable.
+
+        :param cmd: A list with the command and its arguments
+        :param timeout: Time out in seconds
+        :param directory: The working directory
 
+        """
         # Check if executable is on the path
         if not self._isExecutable(cmd[0]):
             print(("Error: Did not find executable '", cmd[0], "'."))
@@ -756,7 +1306,6 @@ simulateModel(modelInstance, startTime={start_time}, stopTime={stop_time}, metho
         :param fractionComplete: The fraction of the time that is completed.
 
         """
-        import sys
         nInc = 50
         count = int(nInc * fractionComplete)
         proBar = "|"
@@ -769,14 +1318,17 @@ simulateModel(modelInstance, startTime={start_time}, stopTime={stop_time}, metho
         print((proBar, int(fractionComplete * 100), "%\r",))
         sys.stdout.flush()
 
-    def _declare_parameters(self):
+    def _declare_parameters(self, parameters=None):
         """ Declare list of parameters
+
+        :param parameters: A dictionary with parameter values, or ``None``
+                           to use the parameters of this simulator.
         """
         def to_modelica(arg):
             """ Convert to Modelica array.
             """
             # Check for strings and booleans
-            if isinstance(arg, basestring):
+            if isinstance(arg, str):
                 return '\\"' + arg + '\\"'
             elif isinstance(arg, bool):
                 if arg is True:
@@ -787,9 +1339,11 @@ simulateModel(modelInstance, startTime={start_time}, stopTime={stop_time}, metho
                 return '{' + ", ".join(to_modelica(x) for x in arg) + '}'
             except TypeError:
                 return repr(arg)
+        if parameters is None:
+            parameters = self._parameters_
         dec = list()
 
-        for k, v in list(self._parameters_.items()):
+        for k, v in list(parameters.items()):
             # Dymola requires vectors of parameters to be set in the format
             # p = {1, 2, 3} rather than in the format of python arrays, which
             # is p = [1, 2, 3].
@@ -802,26 +1356,339 @@ simulateModel(modelInstance, startTime={start_time}, stopTime={stop_time}, metho
     def _create_worDir(self):
         """ Create working directory
         """
-        import os
-        import tempfile
-        import getpass
-        curDir = os.path.abspath(self._packagePath)
-        ds = curDir.split(os.sep)
-        dirNam = ds[len(ds) - 1]
+        dirNam = os.path.basename(self._packagePathAbs)
         worDir = os.path.join(tempfile.mkdtemp(
             prefix='tmp-simulator-' + getpass.getuser() + '-'), dirNam)
         return worDir
 
-    def _check_simulation_errors(self, worDir):
+    def _check_simulation_errors(self, worDir, log_file='simulator.log'):
         """ Method that checks if errors occured during simulation.
+
+        :param worDir: The working directory.
+        :param log_file: The name of the log file that will be checked.
+
+        The log file is read line by line, as it can be large for long simulations.
+        As in :func:`buildingspy.io.outputfile.get_errors_and_warnings`, the line
+        that follows the line ``... Error message from dymosim`` is reported
+        as an error. At most ``_MAX_REPORTED_ERRORS`` errors are reported.
         """
-        import os
-        from buildingspy.io.outputfile import get_errors_and_warnings
-        path_to_logfile = os.path.join(worDir, 'simulator.log')
-        ret = get_errors_and_warnings(path_to_logfile, 'dymola')
-        if not ret["errors"]:
-            pass
-        else:
-            for li in ret["errors"]:
+        path_to_logfile = os.path.join(worDir, log_file)
+        if not os.path.isfile(path_to_logfile):
+            raise IOError("File {} does not exist".format(path_to_logfile))
+
+        errors = []
+        with open(path_to_logfile, mode="r", encoding="utf-8-sig", buffering=1 << 20) as fil:
+            isError = False
+            for lin in fil:
+                if isError:
+                    errors.append(lin.strip())
+                    if len(errors) >= _MAX_REPORTED_ERRORS:
+                        break
+                isError = _DYMOSIM_WARNING not in lin and _DYMOSIM_ERROR in lin
+
+        if errors:
+            for li in errors:
                 self._reporter.writeError(li)
             raise IOError
+
+
+def _validate_package_path(packagePath):
+    """ Raises a ``ValueError`` if ``packagePath`` does not exist or is not a directory.
+
+    :param packagePath: The path of the package.
+
+    The path is checked with a single call of ``os.stat``.
+    """
+    try:
+        mode = os.stat(packagePath).st_mode
+    except OSError:
+        msg = "Argument packagePath=%s does not exist." % packagePath
+        raise ValueError(msg)
+
+    if not stat.S_ISDIR(mode):
+        msg = "Argument packagePath=%s must be a directory " % packagePath
+        msg += "containing a Modelica package."
+        raise ValueError(msg)
+
+
+@functools.lru_cache(maxsize=8)
+def _path_entries(path_env):
+    """ Returns a tuple with the directories of ``path_env``, each ending
+        with a path separator so that a file name can be appended.
+
+    :param path_env: The value of the ``PATH`` environment variable.
+
+    The value of ``PATH`` is passed as an argument rather than read once
+    when the module is imported, so that changes of ``PATH`` are seen.
+    As for ``os.path.join``, no separator is added to an empty entry.
+    """
+    return tuple(path if not path or path.endswith(os.sep) else path + os.sep
+                 for path in path_env.split(os.pathsep))
+
+
+# Programs, given by their name only, that were found by _find_executable.
+# Programs that were not found are not stored, so that a program that is
+# installed later is found.
+_FOUND_EXECUTABLES = set()
+
+
+def _find_executable(program, path_env):
+    """ Returns ``True`` if ``program`` is an executable, either as given
+        or in one of the directories of ``path_env``.
+
+    :param program: The name of the program.
+    :param path_env: The value of the ``PATH`` environment variable.
+
+    If ``program`` has no directory, then a successful search is remembered,
+    as the search is repeated for each simulation. As ``path_env`` and the
+    current working directory are part of the key, a change of either leads to
+    a new search. A program with a directory, such as the executable of a
+    translated model, is tested again for each call.
+    """
+    def is_exe(fpath):
+        return os.path.exists(fpath) and os.access(fpath, os.X_OK)
+
+    # Add .exe, which is needed on Windows 7 to test existence
+    # of the program, unless it is already part of the name,
+    # as for the executable of a translated model
+    if _IS_WINDOWS and not program.lower().endswith(".exe"):
+        program = program + ".exe"
+
+    if os.path.dirname(program):
+        return is_exe(program)
+
+    key = (program, path_env, os.getcwd())
+    if key in _FOUND_EXECUTABLES:
+        return True
+    if is_exe(program) or any(is_exe(path + program) for path in _path_entries(path_env)):
+        _FOUND_EXECUTABLES.add(key)
+        return True
+    return False
+
+
+def _is_temporary_directory(directory):
+    """ Returns ``True`` if ``directory`` is in the directory for temporary files
+        and its name starts with ``tmp-simulator-``, as for directories created
+        by :meth:`~Simulator._create_worDir`.
+
+    :param directory: The name of the directory.
+    """
+    if not os.path.basename(directory).startswith('tmp-simulator-'):
+        return False
+    temDir = os.path.normcase(os.path.abspath(tempfile.gettempdir()))
+    try:
+        return os.path.commonpath(
+            [os.path.normcase(os.path.abspath(directory)), temDir]) == temDir
+    except ValueError:
+        # The paths are on different drives
+        return False
+
+
+def _remove_links(directory):
+    """ Removes all symbolic links in ``directory`` and its subdirectories,
+        without following the links.
+
+    :param directory: The name of the directory.
+    """
+    stack = [directory]
+    while stack:
+        for ent in os.scandir(stack.pop()):
+            if ent.is_symlink():
+                # On Windows, a link to a directory is removed like a directory
+                if _IS_WINDOWS and ent.is_dir():
+                    os.rmdir(ent.path)
+                else:
+                    os.unlink(ent.path)
+            elif ent.is_dir():
+                stack.append(ent.path)
+
+
+def _has_many_entries(directory, limit):
+    """ Returns ``True`` if ``directory`` and its subdirectories contain
+        at least ``limit`` files and directories.
+
+    :param directory: The name of the directory.
+    :param limit: The number of entries.
+
+    Symbolic links are counted, but not followed. The search stops
+    once ``limit`` entries are found.
+    """
+    nEnt = 0
+    stack = [directory]
+    while stack:
+        for ent in os.scandir(stack.pop()):
+            nEnt += 1
+            if nEnt >= limit:
+                return True
+            if ent.is_dir(follow_symlinks=False):
+                stack.append(ent.path)
+    return False
+
+
+def _remove_tree(directory):
+    """ Deletes ``directory`` and all its content.
+
+    :param directory: The name of the directory.
+
+    The directory is deleted with ``shutil.rmtree``, which does not follow
+    symbolic links, hence a linked package is not deleted.
+    On Linux and macOS, large directories, such as directories with the
+    files generated for a large model, are deleted with ``rm -rf``, which is
+    faster if there are many files. As for ``shutil.rmtree``, the arguments
+    are passed to ``rm`` without a shell.
+    """
+    if _IS_WINDOWS:
+        # Remove the links to the package first, as Windows requires
+        # links to directories to be removed with rmdir
+        _remove_links(directory)
+    elif _has_many_entries(directory, _MIN_ENTRIES_FOR_RM) and \
+            _find_executable("rm", os.environ.get("PATH", "")):
+        subprocess.call(["rm", "-rf", "--", directory],
+                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if os.path.lexists(directory):
+        shutil.rmtree(directory)
+
+
+def _initialize_worker(counter, nWorkers):
+    """ Initializes a worker process of :func:`runParallel`.
+
+    :param counter: A shared counter that is used to enumerate the workers.
+    :param nWorkers: The number of worker processes.
+
+    .. note:: This function is outside the class definition to
+              allow parallel computing.
+    """
+    with counter.get_lock():
+        iWor = counter.value
+        counter.value += 1
+
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(multiprocessing.cpu_count()))
+    nCor = max(1, len(cores) // nWorkers)
+    # Limit the threads of the simulation executables to the cores of this worker,
+    # as otherwise OpenMP and MKL oversubscribe the machine.
+    os.environ["OMP_NUM_THREADS"] = str(nCor)
+    # On Linux, pin this worker, and hence its simulations, to its own set of cores.
+    if hasattr(os, "sched_setaffinity"):
+        iSta = (iWor * nCor) % len(cores)
+        os.sched_setaffinity(0, cores[iSta:iSta + nCor])
+    # Suppress the standard output, as the workers otherwise write to the console concurrently.
+    sys.stdout = open(os.devnull, mode="w")
+
+
+def _simulate_in_worker(simulator):
+    """ Runs the simulation of ``simulator``.
+
+    :param simulator: A simulator object.
+
+    .. note:: This function is outside the class definition to
+              allow parallel computing.
+
+    The process pool of :func:`runParallel` replaces a worker that exits, and then
+    waits forever for its result. Hence, a ``SystemExit``, which is raised if
+    the simulator is not on the path, is converted to a ``RuntimeError``
+    that contains the output of the simulator, as the standard output
+    of the worker is suppressed.
+    """
+    out = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(out):
+            simulator.simulate()
+    except SystemExit as e:
+        raise RuntimeError("Simulation exited with code {}:\n{}".format(e.code, out.getvalue()))
+
+
+def runParallel(simulators, nWorkers=None):
+    """ Runs the simulations of a list of simulators in parallel.
+
+    :param simulators: A list of :class:`~Simulator` objects.
+    :param nWorkers: The number of worker processes. If ``None``, then
+                     the number of processors is used.
+
+    Usage: Type
+       >>> import buildingspy.simulate.Simulator as si
+       >>> li = []
+       >>> for i, k in enumerate([0.1, 1]):
+       ...     s = si.Simulator("myPackage.myModel", "dymola", packagePath="buildingspy/tests/MyModelicaLibrary")
+       ...     s.addParameters({'con.k': k})
+       ...     s.setResultFile("case{}".format(i))
+       ...     li.append(s)
+       >>> si.runParallel(li)  # doctest: +SKIP
+
+    Each worker process sets the environment variable ``OMP_NUM_THREADS``
+    to its share of the processors, and on Linux it is pinned to its own set
+    of processors. The standard output of the worker processes is suppressed.
+    Errors are written to the log file of each simulator, as for
+    :meth:`~Simulator.simulate`. If a simulator exits, for example because
+    its executable is not on the path, then a ``RuntimeError`` is raised.
+
+    As the simulations run in other processes, the simulator objects
+    in ``simulators`` are not modified.
+    """
+    if nWorkers is None:
+        nWorkers = multiprocessing.cpu_count()
+    nWorkers = max(1, min(nWorkers, len(simulators)))
+
+    counter = multiprocessing.Value('i', 0)
+    po = multiprocessing.Pool(nWorkers,
+                              initializer=_initialize_worker,
+                              initargs=(counter, nWorkers))
+    try:
+        po.map(_simulate_in_worker, simulators)
+    finally:
+        po.close()
+        po.join()
+
+
+def _translate_in_thread(simulator):
+    """ Translates the model of ``simulator``.
+
+    :param simulator: A simulator object.
+
+    The thread pool of :func:`translateMany` only forwards exceptions
+    that are derived from ``Exception``. Hence, a ``SystemExit``, which is raised if
+    the simulator is not on the path, is converted to a ``RuntimeError``.
+    """
+    try:
+        simulator.translate()
+    except SystemExit as e:
+        raise RuntimeError("Translation exited with code {}.".format(e.code))
+
+
+def translateMany(simulators, concurrency=None):
+    """ Translates the models of a list of simulators concurrently.
+
+    :param simulators: A list of :class:`~Simulator` objects.
+    :param concurrency: The maximum number of simulators that run at the same time.
+                        If ``None``, then the number of processors is used.
+
+    Usage: Type
+       >>> import buildingspy.simulate.Simulator as si
+       >>> li = []
+       >>> for k in [0.1, 1]:
+       ...     s = si.Simulator("myPackage.myModel", "dymola", packagePath="buildingspy/tests/MyModelicaLibrary")
+       ...     s.addParameters({'con.k': k})
+       ...     li.append(s)
+       >>> si.translateMany(li, concurrency=2)  # doctest: +SKIP
+
+    Other than :func:`runParallel`, the translations are started from threads
+    of this process, as each thread only waits for its simulator process.
+    Hence, the simulator objects in ``simulators`` are updated as for
+    :meth:`~Simulator.translate`, and each translated model is kept in the
+    temporary directory of its simulator. If a translation fails, the exception
+    of the first failed translation is raised once all translations finished.
+    """
+    if len(simulators) == 0:
+        return
+    if concurrency is None:
+        concurrency = multiprocessing.cpu_count()
+    concurrency = max(1, min(concurrency, len(simulators)))
+
+    po = ThreadPool(concurrency)
+    try:
+        po.map(_translate_in_thread, simulators)
+    finally:
+        po.close()
+        po.join()
@@ -30,6 +30,41 @@ class Test_regressiontest_optimica_Tester(unittest.TestCase):
         rt = r.Tester(check_html=False, tool="optimica")
         self.assertEqual('unitTests-optimica.log', rt.get_unit_test_log_file())
 
+    def test_result_handling(self):
+        """ Test that the result handling is written to the run file,
+            and that the binary result file is written if results are compared.
+        """
+        import shutil
+        import tempfile
+        from unittest import mock
+        import buildingspy.development.regressiontest as r
+
+        rt = r.Tester(check_html=False, tool="optimica")
+        dir_name = tempfile.mkdtemp(prefix='tmp-BuildingsPy-unittests-')
+        try:
+            with mock.patch.object(rt._reporter, "writeWarning") as warn:
+                for result_variables, expected in [([], 'memory'), ([['x']], 'binary')]:
+                    dat = {'model_name': 'TestLib.Test',
+                           'mustSimulate': True,
+                           'tolerance': 1E-6,
+                           'optimica': {'translate': True,
+                                        'simulate': True,
+                                        'solver': 'CVode',
+                                        'ncp': 500,
+                                        'result_handling': 'memory',
+                                        'time_out': 1200}}
+                    if result_variables:
+                        dat['ResultVariables'] = result_variables
+                    rt._write_jmodelica_runfile(dir_name, [dat])
+                    with open(os.path.join(dir_name, "TestLib_Test.py"), mode="r",
+                              encoding="utf-8") as fil:
+                        self.assertIn("opts['result_handling'] = '{}'".format(expected),
+                                      fil.read())
+                    self.assertEqual(0 if expected == 'memory' else 1, warn.call_count)
+            self.assertIn("Result handling 'memory'", warn.call_args[0][0])
+        finally:
+            shutil.rmtree(dir_name)
+
     @staticmethod
     def _write_test(content):
         """ Write a unit test for a model with the content `content`
@@ -17,6 +17,31 @@ import os
 from buildingspy.simulate.Simulator import Simulator
 
 
+class _SimulatorMock(object):
+    """
+       Class with a ``simulate`` method that writes a file, used
+       to test :func:`buildingspy.simulate.Simulator.runParallel`,
+       and a ``translate`` method, used to test
+       :func:`buildingspy.simulate.Simulator.translateMany`.
+    """
+
+    def __init__(self, fileName):
+        self._fileName = fileName
+        self.translated = False
+
+    def simulate(self):
+        if self._fileName is None:
+            print("Error: Did not find executable.")
+            exit(3)
+        with open(self._fileName, mode="w") as f:
+            f.write(os.environ["OMP_NUM_THREADS"])
+
+    def translate(self):
+        if self._fileName is None:
+            exit(3)
+        self.translated = True
+
+
 class Test_simulate_Simulator(unittest.TestCase):
     """
        This class contains the unit tests for
@@ -52,6 +77,42 @@ class Test_simulate_Simulator(unittest.TestCase):
         self.assertRaises(ValueError, Simulator,
                           "myModelicaLibrary.myModel", "notSupported", path)
 
+        # Check that the output directory is not a file
+        self.assertRaises(ValueError, Simulator,
+                          "MyModelicaLibrary.MyModel", "dymola",
+                          os.path.join(self._packagePath, "package.mo"),
+                          self._packagePath)
+
+    def test_sharedReporter(self):
+        """
+        Tests that only simulators with a shared reporter share their reporter.
+        """
+        s1 = Simulator("MyModelicaLibrary.MyModel", "dymola", packagePath=self._packagePath)
+        s2 = Simulator("MyModelicaLibrary.MyModel", "dymola", packagePath=self._packagePath)
+        self.assertIsNot(s1._reporter, s2._reporter)
+        s2._reporter.writeError("Error of s2.")
+        self.assertEqual(0, s1._reporter.getNumberOfErrors())
+
+        s3 = Simulator("MyModelicaLibrary.MyModel", "dymola", packagePath=self._packagePath,
+                       sharedReporter=s1._reporter)
+        self.assertIs(s1._reporter, s3._reporter)
+        s3._reporter.writeError("Error of s3.")
+        self.assertEqual(1, s1._reporter.getNumberOfErrors())
+
+    def test_setAttributes(self):
+        """
+        Tests that attributes can be added to a simulator, and that it can be referenced weakly.
+        """
+        import weakref
+        from unittest import mock
+
+        s = Simulator("MyModelicaLibrary.MyModel", "dymola", packagePath=self._packagePath)
+        s.myAttribute = 1
+        self.assertEqual(1, s.myAttribute)
+        with mock.patch.object(s, "simulate", return_value=None):
+            s.simulate()
+        self.assertIs(s, weakref.ref(s)())
+
     def test_setPackagePath(self):
         """
         Tests the ``setPackagePath'' method.
@@ -65,6 +126,19 @@ class Test_simulate_Simulator(unittest.TestCase):
         # Try to load a not existing path.
         self.assertRaises(ValueError, s.setPackagePath, "ThisIsAWrongPath")
 
+        # Try to load a file rather than a directory.
+        self.assertRaises(ValueError, s.setPackagePath, os.path.join(p, "package.mo"))
+
+        # Try to load a path that has been deleted after it has been set.
+        import shutil
+        import tempfile
+        temDir = tempfile.mkdtemp()
+        s.setPackagePath(temDir)
+        shutil.rmtree(temDir)
+        with self.assertRaisesRegex(ValueError, "ThisIsAWrongPath does not exist"):
+            s.setPackagePath("ThisIsAWrongPath")
+        self.assertRaises(ValueError, s.setPackagePath, temDir)
+
     def test_wrong_package_path_simulation(self):
         """
         Tests reporting the exception if a simulation fails.
@@ -196,6 +270,406 @@ class Test_simulate_Simulator(unittest.TestCase):
         s.deleteOutputFiles()
         s.deleteLogFiles()
 
+    def test_simulateBatchCommands(self):
+        """
+        Tests the script that is generated for :mod:`buildingspy.simulate.Simulator.simulateBatch`.
+        """
+        s = Simulator("MyModelicaLibrary.MyModel", "dymola", packagePath=self._packagePath)
+        s.addParameters({'PID.k': 1.0})
+        runs = [(s._get_declarations({'PID.k': 1.0, 'PID.Ti': 10.0}), "MyModel_0"),
+                (s._get_declarations({'PID.k': 1.0, 'PID.Ti': 100.0}), "MyModel_1")]
+        cmd = s._get_dymola_commands(working_directory=".",
+                                     log_file="simulator.log",
+                                     runs=runs)
+        self.assertEqual(1, cmd.count('openModel("package.mo");'))
+        self.assertEqual(1, cmd.count('RunScript("modifiers.mos");'))
+        self.assertIn("simulateModel(modelInstance0,", cmd)
+        self.assertIn("simulateModel(modelInstance1,", cmd)
+        self.assertIn('resultFile="MyModel_0"', cmd)
+        self.assertIn('resultFile="MyModel_1"', cmd)
+        self.assertEqual(1, cmd.count('savelog("simulator.log");'))
+        mod = "\n".join(s._get_modifier_commands(runs))
+        self.assertIn("PID.Ti=100.0", mod)
+        self.assertIn('modelInstance1=modelInstance1 + ")";', mod)
+
+        # Without parameter sets, nothing is simulated
+        from unittest import mock
+        with mock.patch.object(s, "_simulate") as sim:
+            s.simulateBatch([])
+        sim.assert_not_called()
+
+    def test_modifierCommands(self):
+        """
+        Tests the definition of the model instances.
+        """
+        import buildingspy.simulate.Simulator as sim
+
+        s = Simulator("MyModelicaLibrary.MyModel", "dymola", packagePath=self._packagePath)
+        # Without declarations, the model instance is defined in the run script.
+        runs = [(s._get_declarations(), "MyModel")]
+        self.assertEqual([], runs[0][0])
+        cmd = s._get_dymola_commands(working_directory=".",
+                                     log_file="simulator.log",
+                                     runs=runs)
+        self.assertNotIn("RunScript", cmd)
+        self.assertIn('modelInstance0="MyModelicaLibrary.MyModel";', cmd)
+        self.assertEqual('"MyModelicaLibrary.MyModel"', s._get_model_instance([]))
+        # Many declarations are split over several statements.
+        n = 2 * sim._DECLARATIONS_PER_LINE + 1
+        s.addParameters({"p{}".format(i): i for i in range(n)})
+        dec = s._get_declarations()
+        mod = s._get_modifier_commands([(dec, "MyModel")])
+        self.assertEqual(5, len(mod))
+        self.assertEqual(n, sum(line.count("=") for line in mod[1:-1]) - 3)
+
+    def test_clonePackage(self):
+        """
+        Tests cloning the package to the working directory.
+        """
+        import shutil
+        import tempfile
+
+        s = Simulator("MyModelicaLibrary.MyModel", "dymola", packagePath=self._packagePath)
+        temDir = tempfile.mkdtemp()
+        try:
+            dst = os.path.join(temDir, "MyModelicaLibrary")
+            s._clone_package(self._packagePath, dst)
+            for fil in ["package.mo", "MyModel.mo", os.path.join("Examples", "Constants.mo")]:
+                self.assertTrue(os.path.isfile(os.path.join(dst, fil)),
+                                "File {} does not exist.".format(fil))
+            # Use a source on the same file system so that files can be linked.
+            # Files in the top-level directory that may be written by the simulator are copied.
+            src = tempfile.mkdtemp(dir=temDir)
+            os.mkdir(os.path.join(src, ".git"))
+            os.mkdir(os.path.join(src, "Examples"))
+            for fil in ["package.mo", "run.mos", os.path.join("Examples", "run.mos"),
+                        os.path.join("Examples", "Constants.mo")]:
+                with open(os.path.join(src, fil), mode="w") as f:
+                    f.write(fil)
+            # By default, the package is not linked.
+            self.assertFalse(s._linkPackage)
+            for link in [True, False]:
+                s.linkPackage(link)
+                dst = os.path.join(temDir, "clone{}".format(link))
+                s._clone_package(src, dst)
+                self.assertTrue(os.path.samefile(os.path.join(src, "package.mo"),
+                                                 os.path.join(dst, "package.mo")))
+                self.assertFalse(os.path.samefile(os.path.join(src, "run.mos"),
+                                                  os.path.join(dst, "run.mos")))
+                self.assertTrue(os.path.samefile(os.path.join(src, "Examples", "Constants.mo"),
+                                                 os.path.join(dst, "Examples", "Constants.mo")))
+                # Files other than Modelica files are only shared if the package is linked.
+                self.assertEqual(link, os.path.samefile(os.path.join(src, "Examples", "run.mos"),
+                                                        os.path.join(dst, "Examples", "run.mos")))
+                self.assertFalse(os.path.exists(os.path.join(dst, ".git")))
+                self.assertEqual(link, os.path.islink(os.path.join(dst, "Examples")))
+        finally:
+            shutil.rmtree(temDir)
+
+    def test_isExecutable(self):
+        """
+        Tests the search for an executable on the ``PATH``.
+        """
+        import shutil
+        import tempfile
+        from unittest import mock
+        import buildingspy.simulate.Simulator as sim
+
+        s = Simulator("MyModelicaLibrary.MyModel", "dymola", packagePath=self._packagePath)
+        # A program that is not found is searched again, and found once it is installed
+        name = "buildingspy-no-such-program"
+        binDir = tempfile.mkdtemp()
+        try:
+            with mock.patch.dict(os.environ, {"PATH": binDir}):
+                self.assertFalse(s._isExecutable(name))
+                exe = os.path.join(binDir, name + (".exe" if os.name == "nt" else ""))
+                with open(exe, mode="w") as f:
+                    f.write("")
+                os.chmod(exe, 0o755)
+                self.assertTrue(s._isExecutable(name))
+                self.assertIn((os.path.basename(exe), binDir, os.getcwd()),
+                              sim._FOUND_EXECUTABLES)
+        finally:
+            shutil.rmtree(binDir)
+        # A program with a directory is tested again after it has been deleted
+        self.assertFalse(s._isExecutable(exe))
+        # On Windows, .exe is not added if the name already ends with .exe
+        binDir = tempfile.mkdtemp()
+        try:
+            exe = os.path.join(binDir, "dymosim.exe")
+            with open(exe, mode="w") as f:
+                f.write("")
+            os.chmod(exe, 0o755)
+            with mock.patch.object(sim, "_IS_WINDOWS", True):
+                self.assertTrue(s._isExecutable(exe))
+                self.assertTrue(s._isExecutable(os.path.join(binDir, "dymosim")))
+        finally:
+            shutil.rmtree(binDir)
+        self.assertEqual(("a" + os.sep, "", "b" + os.sep),
+                         sim._path_entries(os.pathsep.join(["a", "", "b" + os.sep])))
+
+    def test_isTemporaryDirectory(self):
+        """
+        Tests the check of the directories that may be deleted.
+        """
+        import shutil
+        import tempfile
+        from unittest import mock
+        import buildingspy.simulate.Simulator as sim
+
+        # Use a dedicated directory for temporary files, as the test must not
+        # depend on whether the repository is in the system's temporary directory
+        rootDir = tempfile.mkdtemp()
+        temDir = os.path.join(rootDir, "tmp")
+        try:
+            with mock.patch("tempfile.gettempdir", return_value=temDir):
+                self.assertTrue(sim._is_temporary_directory(
+                    os.path.join(temDir, "tmp-simulator-user-abc")))
+                self.assertFalse(sim._is_temporary_directory(temDir))
+                self.assertFalse(sim._is_temporary_directory(
+                    os.path.join(temDir, "tmp-simulator-user-abc", "MyModelicaLibrary")))
+                self.assertFalse(sim._is_temporary_directory(
+                    os.path.join(rootDir, "other", "tmp-simulator-user-abc")))
+                # A sibling directory whose name starts with the name of temDir
+                self.assertFalse(sim._is_temporary_directory(
+                    os.path.join(rootDir, "tmp2", "tmp-simulator-user-abc")))
+        finally:
+            shutil.rmtree(rootDir)
+
+    def test_removeTree(self):
+        """
+        Tests deleting a directory, without deleting the targets of its links.
+        """
+        import shutil
+        import tempfile
+        from unittest import mock
+        import buildingspy.simulate.Simulator as sim
+
+        temDir = tempfile.mkdtemp()
+        try:
+            src = os.path.join(temDir, "src")
+            os.makedirs(os.path.join(src, "Examples"))
+            with open(os.path.join(src, "Examples", "a.txt"), mode="w") as f:
+                f.write("a")
+            # Small directories are deleted with shutil.rmtree, and large directories
+            # with rm on Linux and macOS.
+            for minEnt in [sim._MIN_ENTRIES_FOR_RM, 1]:
+                dst = os.path.join(temDir, "dst")
+                os.makedirs(os.path.join(dst, "sub"))
+                with open(os.path.join(dst, "sub", "a.txt"), mode="w") as f:
+                    f.write("a")
+                try:
+                    os.symlink(os.path.join(src, "Examples"),
+                               os.path.join(dst, "Examples"),
+                               target_is_directory=True)
+                except OSError:
+                    pass
+                self.assertTrue(sim._has_many_entries(dst, 2))
+                self.assertFalse(sim._has_many_entries(dst, 4))
+                with mock.patch.object(sim, "_MIN_ENTRIES_FOR_RM", minEnt):
+                    sim._remove_tree(dst)
+                self.assertFalse(os.path.exists(dst))
+                self.assertTrue(os.path.isfile(os.path.join(src, "Examples", "a.txt")))
+            # Remove links without following them.
+            os.makedirs(os.path.join(dst, "sub"))
+            try:
+                os.symlink(os.path.join(src, "Examples"),
+                           os.path.join(dst, "sub", "Examples"),
+                           target_is_directory=True)
+            except OSError:
+                pass
+            sim._remove_links(dst)
+            self.assertEqual([], os.listdir(os.path.join(dst, "sub")))
+            self.assertTrue(os.path.isfile(os.path.join(src, "Examples", "a.txt")))
+        finally:
+            shutil.rmtree(temDir)
+
+    def test_reuseWorkingDirectory(self):
+        """
+        Tests the working directory that is reused by all simulations.
+        """
+        s = Simulator("MyModelicaLibrary.MyModel", "dymola", packagePath=self._packagePath)
+        s.reuseWorkingDirectory()
+        worDir = s._get_shared_worDir()
+        try:
+            self.assertTrue(os.path.isfile(os.path.join(worDir, "package.mo")))
+            self.assertEqual(worDir, s._get_shared_worDir())
+            cmd = s._get_dymola_commands(working_directory=worDir,
+                                         log_file="simulator.log",
+                                         runs=[([], "MyModel")],
+                                         package_file="../package.mo")
+            # Dymola must stay in the run directory after opening the shared package
+            self.assertIn('openModel("../package.mo", changeDirectory=false);', cmd)
+        finally:
+            s.deleteSimulateDirectory()
+        self.assertFalse(os.path.exists(worDir))
+        self.assertNotEqual(worDir, s._get_shared_worDir())
+        s.deleteSimulateDirectory()
+
+    def test_deleteOutputFiles(self):
+        """
+        Tests deleting the output files of the simulator.
+        """
+        import shutil
+        import tempfile
+
+        s = Simulator("MyModelicaLibrary.MyModel", "dymola", packagePath=self._packagePath)
+        temDir = tempfile.mkdtemp()
+        try:
+            deleted = ['dsin.txt', 'dsmodel.c', 'dsmodel1.c', 'dymosim', 'myResults.mat']
+            kept = ['package.mo', 'other.mat', 'dsin.txt.bak']
+            for fil in deleted + kept:
+                with open(os.path.join(temDir, fil), mode="w") as f:
+                    f.write(fil)
+            os.mkdir(os.path.join(temDir, 'status'))
+            s._delete_matching_files(temDir, ['myResults.mat'])
+            self.assertEqual(sorted(kept + ['status']), sorted(os.listdir(temDir)))
+            # Delete files by their exact name, and skip files that do not exist
+            s._delete_existing_files(temDir, ['package.mo', 'dsin.txt'])
+            self.assertEqual(sorted(['other.mat', 'dsin.txt.bak', 'status']),
+                             sorted(os.listdir(temDir)))
+        finally:
+            shutil.rmtree(temDir)
+
+    def test_checkSimulationErrors(self):
+        """
+        Tests reporting the errors from the simulation log file.
+        """
+        import shutil
+        import tempfile
+
+        s = Simulator("MyModelicaLibrary.MyModel", "dymola", packagePath=self._packagePath)
+        temDir = tempfile.mkdtemp()
+        try:
+            logFil = os.path.join(temDir, "simulator.log")
+            with open(logFil, mode="w", encoding="utf-8") as f:
+                f.write("Warning: Some warning\nIntegration terminated successfully.\n")
+            s._check_simulation_errors(temDir)
+
+            with open(logFil, mode="w", encoding="utf-8") as f:
+                f.write("... Error message from dymosim\nDivision by zero.\n" * 200)
+            nErr = s._reporter.getNumberOfErrors()
+            self.assertRaises(IOError, s._check_simulation_errors, temDir)
+            self.assertEqual(100, s._reporter.getNumberOfErrors() - nErr)
+
+            self.assertRaises(IOError, s._check_simulation_errors, temDir, "dslog.txt")
+        finally:
+            shutil.rmtree(temDir)
+
+    def test_runParallel(self):
+        """
+        Tests the :func:`buildingspy.simulate.Simulator.runParallel` function.
+        """
+        import multiprocessing
+        import shutil
+        import tempfile
+        from buildingspy.simulate.Simulator import runParallel
+
+        temDir = tempfile.mkdtemp()
+        try:
+            fileNames = [os.path.join(temDir, "sim{}.txt".format(i)) for i in range(4)]
+            runParallel([_SimulatorMock(f) for f in fileNames], nWorkers=2)
+            # Each worker uses its share of the cores
+            if hasattr(os, "sched_getaffinity"):
+                nCor = len(os.sched_getaffinity(0))
+            else:
+                nCor = multiprocessing.cpu_count()
+            for f in fileNames:
+                self.assertTrue(os.path.isfile(f), "File {} does not exist.".format(f))
+                with open(f, mode="r") as fil:
+                    self.assertEqual(str(max(1, nCor // 2)), fil.read())
+            # A simulation that exits must not block the pool.
+            with self.assertRaisesRegex(RuntimeError, "Did not find executable"):
+                runParallel([_SimulatorMock(None), _SimulatorMock(fileNames[0])], nWorkers=1)
+        finally:
+            shutil.rmtree(temDir)
+
+    def test_translateMany(self):
+        """
+        Tests the :func:`buildingspy.simulate.Simulator.translateMany` function.
+        """
+        from buildingspy.simulate.Simulator import translateMany
+
+        sims = [_SimulatorMock("sim{}.txt".format(i)) for i in range(4)]
+        translateMany(sims, concurrency=2)
+        for s in sims:
+            self.assertTrue(s.translated)
+        # A simulator that exits must not block the other translations.
+        sims = [_SimulatorMock(None), _SimulatorMock("sim.txt")]
+        self.assertRaises(RuntimeError, translateMany, sims)
+        self.assertTrue(sims[1].translated)
+
+    def test_translationCache(self):
+        """
+        Tests the cache for translated models.
+        """
+        import shutil
+        from unittest import mock
+        import tempfile
+
+        s = Simulator("MyModelicaLibrary.MyModel", "dymola", packagePath=self._packagePath)
+        mi = "MyModelicaLibrary.MyModel()"
+        # The hash must only change if the model, its parameters or the settings change
+        h = s._get_translation_hash(mi)
+        self.assertEqual(h, s._get_translation_hash(mi))
+        s.setResultFile("otherResults")
+        s.setTimeOut(100)
+        self.assertEqual(h, s._get_translation_hash(mi))
+        s.setStopTime(10)
+        self.assertNotEqual(h, s._get_translation_hash(mi))
+        self.assertNotEqual(h, s._get_translation_hash("MyModelicaLibrary.MyModel(k=1)"))
+
+        # The package is only scanned once for each package path
+        with mock.patch("os.walk", side_effect=AssertionError("package scanned again")):
+            s._get_translation_hash(mi)
+        s.setPackagePath(os.path.join(self._packagePath, "Examples"))
+        self.assertNotEqual(s._packageHash_[0], s._packagePathAbs)
+        s.setPackagePath(self._packagePath)
+
+        # Store and restore a translated model
+        cacheRoot = tempfile.mkdtemp()
+        worDir = tempfile.mkdtemp()
+        newDir = tempfile.mkdtemp()
+        try:
+            s.useTranslationCache(cacheDirectory=cacheRoot)
+            cacheDir = os.path.join(cacheRoot, h)
+            self.assertFalse(s._restore_from_translation_cache(cacheDir, newDir))
+            for fil in [s._get_dymosim_name(), 'dsin.txt']:
+                with open(os.path.join(worDir, fil), mode="w") as f:
+                    f.write(fil)
+            s._store_in_translation_cache(cacheDir, worDir)
+            self.assertTrue(s._restore_from_translation_cache(cacheDir, newDir))
+            self.assertTrue(os.path.isfile(os.path.join(newDir, 'dsin.txt')))
+
+            # On a cache hit, the package is not cloned
+            s.setStopTime(1)
+            s.setResultFile("mat")
+            h = s._get_translation_hash(s._get_model_instance(s._get_declarations()))
+            s._store_in_translation_cache(os.path.join(cacheRoot, h), worDir)
+            with mock.patch.object(s, "_clone_package") as clone, \
+                    mock.patch.object(s, "_runCommand") as run, \
+                    mock.patch.object(s, "_check_simulation_errors"), \
+                    mock.patch.object(s, "_copyResultFiles"):
+                s.simulate()
+            clone.assert_not_called()
+            run.assert_called_once()
+
+            # If the cache entry is removed before it is restored, the package is cloned
+            def clonePackage(src, dst):
+                os.makedirs(dst)
+            with mock.patch.object(s, "_restore_from_translation_cache", return_value=False), \
+                    mock.patch.object(s, "_clone_package", side_effect=clonePackage) as clone, \
+                    mock.patch.object(s, "_runSimulation") as run, \
+                    mock.patch.object(s, "_check_simulation_errors"), \
+                    mock.patch.object(s, "_store_in_translation_cache"), \
+                    mock.patch.object(s, "_copyResultFiles"):
+                s.simulate()
+            clone.assert_called_once()
+            run.assert_called_once()
+        finally:
+            for d in [cacheRoot, worDir, newDir]:
+                shutil.rmtree(d)
+
 
 if __name__ == '__main__':
     unittest.main()